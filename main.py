@@ -1,4 +1,3 @@
-import pandas as pd
 import os
 from tools import ChordGenerator, PDF
 
@@ -11,12 +10,9 @@ chord_generator.get_chords(chord_length='3-4-5-6-7')
 # Get midi samples
 chord_generator.generate_midi_samples()
 
-# Create dataframe for the above methods
-chords_df = pd.DataFrame(chord_generator.chords_dict)\
-    .T\
-    .sort_index()  # Transpose so that chordnames are indices and sort on them
-chords_df.columns = [f'Note {x}' for x in range(1,8)]  # Rename
-chords_df.insert(0, 'Chord', chords_df.index)  # Necessary for printing the pdf
+# Create table rows for the above methods: the chord name followed by its notes, sorted on chord name
+chords_header = ('Chord',) + tuple(f'Note {x}' for x in range(1,8))
+chords_rows = ((chord_name, *chord) for chord_name, chord in sorted(chord_generator.chords_dict.items()))
 
 # Create figure
 chord_generator.get_figures()
@@ -26,11 +22,11 @@ chord_generator.get_figures()
 pdf = PDF('Stijn Denissen', f'{chord_generator.key}_{chord_generator.mode}')
 pdf.write_header('Mode Notes', 1)
 pdf.add_figure(f'{chord_generator.figures_path}/{chord_generator.key}_{chord_generator.mode}.png')
-pdf.write_text(f'{chord_generator.key}_{chord_generator.mode}: {str(chord_generator.mode_scale)}')
+pdf.write_text(f'{chord_generator.key}_{chord_generator.mode}: {", ".join(chord_generator.mode_scale)}')
 pdf.write_header('Chord Table', 1)
-pdf.add_table(chords_df)
-chord_figures = os.listdir(chord_generator.figures_path)
-chord_figures.sort()
+pdf.add_table(chords_rows, chords_header)
+with os.scandir(chord_generator.figures_path) as entries:  # One pass over the folder, entries know their path
+    chord_figures = sorted((entry for entry in entries if entry.name.endswith('.png')), key=lambda entry: entry.name)
 for fig in chord_figures:
-    pdf.add_figure(f'{chord_generator.figures_path}/{fig}')
+    pdf.add_figure(fig.path)
 pdf.save(path = 'output/')
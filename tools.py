@@ -1,139 +1,187 @@
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Figures are only saved to file, no GUI needed
 import matplotlib.pyplot as plt
 import os
 import re
-from midiutil import MIDIFile
+import functools
+from types import MappingProxyType
 from datetime import date
+from concurrent.futures import ThreadPoolExecutor
 from fpdf import FPDF
 
+# 2 types of chromatic scales, one with sharps and one with flats
+CHROMATIC_SHARPS = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+CHROMATIC_FLATS = ('C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B')
+
+# Semitone of every note, counted from C. Enharmonic notes (E.g. 'C#' and 'Db') share the same semitone
+SEMITONE = {note: semitone for chromatic in (CHROMATIC_SHARPS, CHROMATIC_FLATS)
+            for semitone, note in enumerate(chromatic)}
+
+# Semitone offsets of the notes inside a mode, counted from the key note
+# Derived from the ionian steps W-W-H-W-W-W-H (Whole (W) = 2 steps, Half (H) = 1 step), rolled for every mode
+MODE_OFFSETS = {'ionian': (0, 2, 4, 5, 7, 9, 11),
+                'dorian': (0, 2, 3, 5, 7, 9, 10),
+                'phrygian': (0, 1, 3, 5, 7, 8, 10),
+                'lydian': (0, 2, 4, 6, 7, 9, 11),
+                'mixolydian': (0, 2, 4, 5, 7, 9, 10),
+                'aeolian': (0, 2, 3, 5, 7, 8, 10),
+                'locrian': (0, 1, 3, 5, 6, 8, 10)
+                }
+
+# Modes that use the chromatic scale with sharps. All other modes use the one with flats
+_SHARP_MODES = frozenset({'lydian'})
+
+# Root notes whose chords and major scale use the chromatic scale with flats. All other notes use the one with sharps
+_FLAT_ROOTS = frozenset({'F', 'A#', 'Bb', 'D#', 'Eb', 'G#', 'Ab', 'Db', 'Gb', 'Cb'})
+
+# Chord positions per chord length. For intuition: read this with +1 --> (0,2,4): (1,3,5).
+_CHORD_POSITIONS = MappingProxyType({'3': ((0, 2, 4),),
+                                     '4': ((0, 2, 4, 5), (0, 2, 4, 6), (0, 2, 4, 8)),
+                                     '5': ((0, 2, 4, 5, 8), (0, 2, 4, 6, 8)),
+                                     '6': ((0,2,4,6,8,10),),
+                                     '7': ((0,2,4,6,8,10,12),)
+                                     })
+
+# Position of every note letter on the note bar
+_LETTER_TO_BAR = MappingProxyType({letter: position for position, letter in enumerate('CDEFGAB')})
+
+# Convert a note to how it appears in the circle of fifths, to be able to get its major scale
+_COF_NOTES = MappingProxyType({'A#': 'Bb',
+                               'D#': 'Eb',
+                               'G#': 'Ab',
+                               'E#': 'F',
+                               'Fb': 'E',
+                               'B#': 'C',
+                               'Cb': 'B'})
+
+# Sharps and flats that are tonically identical to another note
+_SPECIAL_NOTES = MappingProxyType({'E#': 'F',
+                                   'Fb': 'E',
+                                   'B#': 'C',
+                                   'Cb': 'B'})
+
+# Time resolution of the midi files
+_MIDI_TICKS_PER_BEAT = 960
+
 
 # Use this reference for interpretation of modes etc:
 class ChordGenerator:
-    def __init__(self, key, church_mode):
+    # Major scales dictionary. Class attribute shared by all instances, hence read-only
+    MAJOR_SCALE_DICT = MappingProxyType({'C': ('C', 'D', 'E', 'F', 'G', 'A', 'B'),
+                                         'Db': ('Db', 'Eb', 'F', 'Gb', 'Ab', 'Bb', 'C'),
+                                         'C#': ('C#', 'D#', 'E#', 'F#', 'G#', 'A#', 'B#'),  # Alternative form
+                                         'D': ('D', 'E', 'F#', 'G', 'A', 'B', 'C#'),
+                                         'Eb': ('Eb', 'F', 'G', 'Ab', 'Bb', 'C', 'D'),
+                                         'E': ('E', 'F#', 'G#', 'A', 'B', 'C#', 'D#'),
+                                         'F': ('F', 'G', 'A', 'Bb', 'C', 'D', 'E'),
+                                         'Gb': ('Gb', 'Ab', 'Bb', 'Cb', 'Db', 'Eb', 'F'),
+                                         'F#': ('F#', 'G#', 'A#', 'B', 'C#', 'D#', 'E#'),
+                                         'G': ('G', 'A', 'B', 'C', 'D', 'E', 'F#'),
+                                         'Ab': ('Ab', 'Bb', 'C', 'Db', 'Eb', 'F', 'G'),
+                                         'A': ('A', 'B', 'C#', 'D', 'E', 'F#', 'G#'),
+                                         'Bb': ('Bb', 'C', 'D', 'Eb', 'F', 'G', 'A'),
+                                         'B': ('B', 'C#', 'D#', 'E', 'F#', 'G#', 'A#'),
+                                         'Cb': ('Cb', 'Db', 'Eb', 'Fb', 'Gb', 'Ab', 'Bb')  # Alternative form
+                                         })
+
+    # Chord names dictionary. A chord is associated with the difference compared to its regular major-scale form
+    # Class attribute shared by all instances, hence read-only
+    # Note: '6th add 9' is mentioned separately in an if statement
+    # Source: https://fretsource-guitar.weebly.com/chord-construction.html
+    CHORD_NAMES_DICT = MappingProxyType({'Major': (0,0,0),  # 3 Notes
+                                         'Minor': (0,-1,0),
+                                         'Diminished': (0,-1,-1),
+                                         'Augmented': (0,0,1),
+                                         'Suspended 4th': (0,1,0),
+                                         'Suspended 2nd': (0,-2,0),
+                                         'Dominant 7th': (0,0,0,-1),            # 4 Notes
+                                         'Minor 7th': (0, -1, 0, -1),
+                                         'Major 7th': (0,0,0,0),
+                                         'Diminished 7th': (0,-1,-1,-2),
+                                         'Half Dim 7th': (0,-1,-1,-1),
+                                         '6th': (0,0,0,0),
+                                         'Minor 6th': (0,-1,0,0),
+                                         'Added 9th': (0,0,0,0),
+                                         '7th sharp 5': (0, 0, 1, -1),
+                                         '7th flat 5': (0, 0, -1, -1),
+                                         '9th': (0,0,0,-1,0),                   # 5 Notes
+                                         'Minor 9th': (0,-1,0,-1,0),
+                                         'Major 9th': (0,0,0,0,0),
+                                         '7th sharp 9': (0,0,0,-1,1),
+                                         '7th flat 9': (0,0,0,-1,-1),
+                                         '11th': (0,0,0,-1,0,0),                # 6 Notes
+                                         'Minor 11th': (0,-1,0,-1,0,0),
+                                         '7th sharp 11th': (0,0,0,-1,0,1),
+                                         '13th': (0,0,0,-1,0,0,0),              # 7 Notes
+                                         'Minor 13th': (0,-1,0,-1,0,0,0)
+                                         })
+
+    # Previous, lowercase names of the tables above
+    major_scale_dict = MAJOR_SCALE_DICT
+    chord_names_dict = CHORD_NAMES_DICT
+
+    # 2 types of chromatic scales, one with sharps and one with flats
+    chromatic_sharps = CHROMATIC_SHARPS
+    chromatic_flats = CHROMATIC_FLATS
+
+    def __init__(self, key, church_mode, single_midi_file = False):
         """ Set the key and mode
 
         :param church_mode: choose from:
         ['ionian', 'dorian', 'phrygian', 'lydian', 'mixolydian', 'aeolian', 'locrian']
+        :param single_midi_file: bool, if True, generate_midi_samples writes all chords to one midi file with a track
+        per chord, instead of a midi file per chord
         """
         self.key = key
         self.mode = church_mode
+        self.single_midi_file = single_midi_file
         self.resource_1 = 'https://feelyoursound.com/scale-chords/'
         self.resource_2 = 'https://bandnotes.info/tidbits/tidbits-feb.htm'
 
-        # 2 types of chromatic scales, one with sharps and one with flats
-        self.chromatic_sharps = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        self.chromatic_flats = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
-
-        # Chromatic scale used for the mode. Sharps if lydian, Flats if not lydian. Roll to set key as first note
-        mode_chromatic = self.chromatic_flats if self.mode is not 'lydian' else self.chromatic_sharps
-        rolled_mode_chromatic = np.roll(mode_chromatic, -mode_chromatic.index(self.key))
-        self.mode_chromatic = rolled_mode_chromatic
-
-        # Notes inside the mode
-        self.mode_scale = _get_mode_scale(self.mode, self.mode_chromatic)
-
-        # Major scales dictionary.
-        self.major_scale_dict = {'C': ['C', 'D', 'E', 'F', 'G', 'A', 'B'],
-                                 'Db': ['Db', 'Eb', 'F', 'Gb', 'Ab', 'Bb', 'C'],
-                                 'C#': ['C#', 'D#', 'E#', 'F#', 'G#', 'A#', 'B#'],  # Alternative form
-                                 'D': ['D', 'E', 'F#', 'G', 'A', 'B', 'C#'],
-                                 'Eb': ['Eb', 'F', 'G', 'Ab', 'Bb', 'C', 'D'],
-                                 'E': ['E', 'F#', 'G#', 'A', 'B', 'C#', 'D#'],
-                                 'F': ['F', 'G', 'A', 'Bb', 'C', 'D', 'E'],
-                                 'Gb': ['Gb', 'Ab', 'Bb', 'Cb', 'Db', 'Eb', 'F'],
-                                 'F#': ['F#', 'G#', 'A#', 'B', 'C#', 'D#', 'E#'],
-                                 'G': ['G', 'A', 'B', 'C', 'D', 'E', 'F#'],
-                                 'Ab': ['Ab', 'Bb', 'C', 'Db', 'Eb', 'F', 'G'],
-                                 'A': ['A', 'B', 'C#', 'D', 'E', 'F#', 'G#'],
-                                 'Bb': ['Bb', 'C', 'D', 'Eb', 'F', 'G', 'A'],
-                                 'B': ['B', 'C#', 'D#', 'E', 'F#', 'G#', 'A#'],
-                                 'Cb': ['Cb', 'Db', 'Eb', 'Fb', 'Gb', 'Ab', 'Bb']  # Alternative form
-                                 }
-
-        # Chord names dictionary. A chord is associated with the difference compared to its regular major-scale form
-        # Note: '6th add 9' is mentioned separately in an if statement
-        # Source: https://fretsource-guitar.weebly.com/chord-construction.html
-        self.chord_names_dict = {'Major': [0,0,0],  # 3 Notes
-                                 'Minor': [0,-1,0],
-                                 'Diminished': [0,-1,-1],
-                                 'Augmented': [0,0,1],
-                                 'Suspended 4th': [0,1,0],
-                                 'Suspended 2nd': [0,-2,0],
-                                 'Dominant 7th': [0,0,0,-1],            # 4 Notes
-                                 'Minor 7th': [0, -1, 0, -1],
-                                 'Major 7th': [0,0,0,0],
-                                 'Diminished 7th': [0,-1,-1,-2],
-                                 'Half Dim 7th': [0,-1,-1,-1],
-                                 '6th': [0,0,0,0],
-                                 'Minor 6th': [0,-1,0,0],
-                                 'Added 9th': [0,0,0,0],
-                                 '7th sharp 5': [0, 0, 1, -1],
-                                 '7th flat 5': [0, 0, -1, -1],
-                                 '9th': [0,0,0,-1,0],                   # 5 Notes
-                                 'Minor 9th': [0,-1,0,-1,0],
-                                 'Major 9th': [0,0,0,0,0],
-                                 '7th sharp 9': [0,0,0,-1,1],
-                                 '7th flat 9': [0,0,0,-1,-1],
-                                 '11th': [0,0,0,-1,0,0],                # 6 Notes
-                                 'Minor 11th': [0,-1,0,-1,0,0],
-                                 '7th sharp 11th': [0,0,0,-1,0,1],
-                                 '13th': [0,0,0,-1,0,0,0],              # 7 Notes
-                                 'Minor 13th': [0,-1,0,-1,0,0,0]
-                                 }
+        # Sharps if lydian, Flats if not lydian. mode_chromatic and mode_scale are computed on first use
+        self._use_sharps = church_mode in _SHARP_MODES
+
+        # Validate here, so that a wrong key or mode fails at construction instead of in one of the methods
+        if church_mode not in MODE_OFFSETS:
+            raise ValueError(f'Unknown mode {church_mode}. Choose from: {list(MODE_OFFSETS)}')
+        chromatic = self.chromatic_sharps if self._use_sharps else self.chromatic_flats
+        if key not in chromatic:
+            raise ValueError(f'Key {key} is not in the chromatic scale of {church_mode}: {list(chromatic)}')
 
         # Initiations of variables that are generated with the functions
         self.chords_dict = None
         self.midi_path = None
         self.figures_path = None
 
+    @functools.cached_property
+    def mode_chromatic(self):
+        """ Chromatic scale used for the mode, with the key as first note """
+        return _get_mode_chromatic(self.key, self._use_sharps)
+
+    @functools.cached_property
+    def mode_scale(self):
+        """ Notes inside the mode """
+        return _get_mode_scale(self.mode, self.mode_chromatic)
+
     def get_chords(self, chord_length = '3-4'):
         """ Get all chords with prespecified lengths
 
         :param chord_length: str, lengths (int) separated by '-'. E.g.: '3-4-5'
         :return: adds "chords" to the object, a dict with chord name (key) and the notes (values)
         """
+        self.chords_dict = _get_chords_copy(self.key, self.mode, chord_length)
 
-        mode_scale = self.mode_scale
-        mode_chromatic = self.mode_chromatic
-
-        # Second, iterate over all notes inside the mode, get the chord and compare it with its major variant
-        chords_dict = {}
-        for position, note in enumerate(mode_scale):
-
-            # 1. Get chromatic and major scale with first note being the note of interest
-            rolled_chromatic, major_scale = _get_chrom_and_major_scale(note, self.major_scale_dict)
-
-            # 2. Also roll the mode scale and mode chromatic so that first note is the note of interest
-            rolled_mode_scale = np.roll(list(mode_scale),-list(mode_scale).index(note))
-            rolled_mode_chromatic = np.roll(list(mode_chromatic),-list(mode_chromatic).index(note))
-
-            # 3. Get the positions of the major scale notes and mode scale notes inside the chromatic scale
-            major_positions_in_chrom = [rolled_chromatic.index(element) for element in major_scale]
-            mode_positions_in_chrom = [list(rolled_mode_chromatic).index(element) for element in rolled_mode_scale]
-
-            # 4. Get the difference between positions of both scales in chromatic scale
-            scale_diff = np.array(mode_positions_in_chrom) - np.array(major_positions_in_chrom)
-
-            # 5. Repeat the scale_diff and rolled_mode_scale to allow a chord like 1,3,5,9 to be constructed
-            scale_diff_repeated = np.hstack([scale_diff,scale_diff])
-            rolled_mode_scale_repeated = np.hstack([rolled_mode_scale, rolled_mode_scale])
-
-            # 6. Search up the chord difference in the codebook
-            chord_positions_total = _get_chord_positions(chord_length)
-            for chord_positions in chord_positions_total:
-                # Get the chord difference from the duplicated scale
-                chord_diff = scale_diff_repeated[chord_positions]
-
-                # Get the notes inside the mode chord and fill up to 7 with NaN
-                mode_chord = rolled_mode_scale_repeated[chord_positions]
-                nan_tail = ['']*(7-len(mode_chord))
-                mode_chord = np.hstack([mode_chord, nan_tail])
-
-                # Get appendable item
-                chords = _construct_chord_dict(chord_diff, mode_chord, chord_positions, self.chord_names_dict)
-                chords_dict.update(chords)
+    @staticmethod
+    def compute_many(pairs, chord_length = '3-4'):
+        """ Get all chords with prespecified lengths for several keys and modes at once
+        No object is created per pair: the scale and chord name tables are shared, and the chords are cached
 
-        self.chords_dict = chords_dict
+        :param pairs: iterable with (key, mode) tuples. E.g. [('C', 'lydian'), ('D', 'dorian')]
+        :param chord_length: str, lengths (int) separated by '-'. E.g.: '3-4-5'
+        :return: dict, keys: (key, mode) tuples, values: dict with chord name (key) and the notes (values)
+        """
+        return {(key, mode): _get_chords_copy(key, mode, chord_length) for key, mode in pairs}
 
     def generate_midi_samples(self):
         """ Generate midi samples for mode and chords
@@ -150,52 +198,51 @@ class ChordGenerator:
         new_folder_path = f'{os.getcwd()}/output/midi/{self.key}_{self.mode}'
         self.midi_path = new_folder_path
 
-        if not os.path.exists(new_folder_path):
-            os.makedirs(new_folder_path)
-
-        # Generate Midi for the scale. time and tempo in beats, tempo in BPM, volume 0-127 as per MIDI standard
-        MyMIDI = MIDIFile(1)  # One track, defaults to format 1 (tempo track is created automatically)
-        MyMIDI.addTempo(0, 0, 60)
+        os.makedirs(new_folder_path, exist_ok=True)
 
-        for time, (note, pitch) in enumerate(mode_note_dict.items()):  # Add every note in a for loop
-            MyMIDI.addNote(0, 0, pitch, time, 1, 100)
+        # First collect all samples as (path, notes), then write them in one batch
+        # Notes are (pitch, time, duration) tuples, time and duration in beats
+        samples = []
 
-        with open(f"{new_folder_path}/{self.key}_{self.mode}.mid", "wb") as output_file:  # Write the midi file
-            MyMIDI.writeFile(output_file)
+        # Midi for the scale: one note per beat
+        scale_notes = [(pitch, time, 1) for time, pitch in enumerate(mode_note_dict.values())]
+        samples.append((f"{new_folder_path}/{self.key}_{self.mode}.mid", scale_notes))
 
-        # Create midi for all possible chords
+        # Create midi for all possible chords, as (chord_name, notes)
+        chord_samples = []
         for chord_name, chord in self.chords_dict.items():
             chord = [note for note in chord if note != '']  # Remove empty instances
 
             # Get chromatic scale coupled with midi notes, rolled so that root note comes first
             note = chord[0]
-            if note in ['F', 'A#', 'Bb', 'D#', 'Eb', 'G#', 'Ab', 'Db', 'Gb', 'Cb']:
-                chromatic = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
-            else:
-                chromatic = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-            chromatic_note_dict = _get_chromatic_midi_dict(note, chromatic)
+            chromatic_note_dict = _get_chromatic_midi_dict(note, _pick_chromatic(note))
 
             # Extract chord notes from chromatic dict
             chord_note_dict = _mode_notes_from_chromatic(chromatic_note_dict, chord)
 
-            # Generate Midi for the chord. time and tempo in beats, tempo in BPM, volume 0-127 as per MIDI standard
-            MyMIDI = MIDIFile(1)  # One track, defaults to format 1 (tempo track is created automatically)
-            MyMIDI.addTempo(0, 0, 60)
+            # Here, time set to zero so all notes play on same time, duration for 4 bars instead of 1 bar per note
+            chord_notes = [(pitch, 0, 4) for pitch in chord_note_dict.values()]
+            chord_samples.append((chord_name, chord_notes))
 
-            for time, (note, pitch) in enumerate(chord_note_dict.items()):  # Add every note in a for loop
-                # Here, time set to zero so all notes play on same time, duration for 4 bars instead of 1 bar per note
-                MyMIDI.addNote(0, 0, pitch, 0, 4, 100)
+        if self.single_midi_file:
+            # One file for all chords, with a named track per chord. Only the first track sets the tempo
+            tracks = [_midi_track(chord_notes, tempo_bpm=60 if index == 0 else None, name=chord_name)
+                      for index, (chord_name, chord_notes) in enumerate(chord_samples)]
+            _write_midi_tracks(f"{new_folder_path}/{self.key}_{self.mode}_all_chords.mid", tracks)
+        else:
+            samples.extend((f"{new_folder_path}/{chord_name}.mid", chord_notes)
+                           for chord_name, chord_notes in chord_samples)
 
-            with open(f"{new_folder_path}/{chord_name}.mid", "wb") as output_file:  # Write the midi file
-                MyMIDI.writeFile(output_file)
+        # Write the midi files. Each file is small and independent, so let the file writes overlap in threads
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(lambda sample: _write_midi(*sample), samples))  # list() to raise errors, if any
 
     def get_figures(self):
 
         # Create folder in the output folder
         new_folder_path = f'{os.getcwd()}/output/figures/{self.key}_{self.mode}'
         self.figures_path = new_folder_path
-        if not os.path.exists(new_folder_path):
-            os.makedirs(new_folder_path)
+        os.makedirs(new_folder_path, exist_ok=True)
 
         # Get chromatic and roll it back to C in front
         notes_note_bar = ['C','D','E','F','G','A','B']
@@ -204,14 +251,16 @@ class ChordGenerator:
         first_note = notes_note_bar.index(self.key)
         note_positions = range(first_note, first_note + 7)
 
-        # Get list of sharps and flats. Nothing if
-        sharps_flats_list = [re.findall('[#|b]', note)[0] if re.findall('[#|b]', note) else '' for note in self.mode_scale]
+        # Get list of sharps and flats: the second character of the note. Empty string if the note has none
+        sharps_flats_list = [note[1:2] for note in self.mode_scale]
 
-        # Plot mode
+        # Plot mode: all notes in one scatter, then the sharps and flats
         fig, ax = plt.subplots()  # Default size = (8,6)
-        for x_pos, y_pos, sharp_flat in zip(range(1,1 + len(note_positions)), note_positions, sharps_flats_list):
-            ax.scatter(x_pos, y_pos, color = 'k', s= 500)
-            ax.text(x_pos+0.2, y_pos+0.2, sharp_flat, fontdict = {'size': 20})
+        x_positions = range(1, 1 + len(note_positions))
+        ax.scatter(x_positions, note_positions, color = 'k', s= 500)
+        for x_pos, y_pos, sharp_flat in zip(x_positions, note_positions, sharps_flats_list):
+            if sharp_flat:
+                ax.text(x_pos+0.2, y_pos+0.2, sharp_flat, fontdict = {'size': 20})
 
         ax.axhline(y=0, xmin = 0, xmax = 1/10, color = 'k')
         for y_pos in [2, 4, 6, 8, 10]:  # Bar lines
@@ -219,205 +268,347 @@ class ChordGenerator:
 
         ax.set_title(f'{self.key} {self.mode}', fontdict = {'size': 30})
         plt.axis('off')
-        fig.savefig(f'{new_folder_path}/{self.key}_{self.mode}.png')
-        plt.close()
+        fig.savefig(f'{new_folder_path}/{self.key}_{self.mode}.png', dpi=72, bbox_inches=None)
+        plt.close(fig)
 
-        # Plot all chords
+        # Plot all chords. The figure is created once and cleared for every chord
+        fig, ax = plt.subplots()
         for chord_name, chord in self.chords_dict.items():
             chord = [note for note in chord if note != '']  # Remove empty instances
 
-            # Get chromatic and roll it back to C in front
-            notes_note_bar = ['C', 'D', 'E', 'F', 'G', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'A', 'B']
-
-            # Get first position on the note bar
-            first_note_position = notes_note_bar.index(re.findall('[A-Z]', chord[0])[0])
-
-            # Get note positions.
-            note_positions = []
-            for note in chord:
-                indices = np.argwhere(notes_note_bar == note)  # Use instead of .index() since it only takes first match
-                for index in indices:
-                    if index > first_note_position:
-                        note_positions.append(index)
+            # Get note positions on the note bar, from the letter of every note
+            note_positions = [_LETTER_TO_BAR[note[0]] for note in chord]
 
-            note_positions = [notes_note_bar.index(re.findall('[A-Z]', note)[0]) for note in chord]
+            # Get list of sharps and flats: the second character of the note. Empty string if the note has none
+            sharps_flats_list = [note[1:2] for note in chord]
 
-            # Get list of sharps and flats. Nothing if
-            sharps_flats_list = [re.findall('[#|b]', note)[0] if re.findall('[#|b]', note) else '' for note in
-                                 chord]
-
-            fig, ax = plt.subplots()
+            ax.clear()
+            ax.scatter([0]*len(note_positions), note_positions, color='k', s=500)
             for y_pos, sharp_flat in zip(note_positions, sharps_flats_list):
-                ax.scatter(0, y_pos, color='k', s=500)
-                ax.text(0, y_pos, sharp_flat, fontdict={'size': 20, 'color': 'red'})
+                if sharp_flat:
+                    ax.text(0, y_pos, sharp_flat, fontdict={'size': 20, 'color': 'red'})
 
             ax.axhline(y=0, xmin=0.4, xmax=0.6, color='k')
             for y_pos in [2, 4, 6, 8, 10]:  # Bar lines
                 ax.axhline(y=y_pos, color='k')
 
             ax.set_title(chord_name, fontdict = {'size': 30})
-            plt.axis('off')
-            fig.savefig(f'{new_folder_path}/{chord_name}.png')
-            plt.close()
+            ax.axis('off')
+            fig.savefig(f'{new_folder_path}/{chord_name}.png', dpi=72, bbox_inches=None)
+        plt.close(fig)
 
 
 # Internal functions
+def _get_chords_copy(key, mode, chord_length):
+    """ Get all chords with prespecified lengths for a key and mode, as a copy that is safe to alter
+
+    The chords only depend on key, mode and chord_length and are cached by _compute_chords.
+    Both the dict and the note lists are copied, so the cache can't be altered
+
+    :param key: str, e.g. 'C', 'F#', 'Bb'
+    :param mode: str, see ChordGenerator
+    :param chord_length: str, lengths (int) separated by '-'. E.g.: '3-4-5'
+    :return: dict with chord name (key) and the notes (values)
+    """
+    return {chord_name: list(chord) for chord_name, chord in _compute_chords(key, mode, chord_length).items()}
+
+
+@functools.lru_cache(maxsize=256)
+def _compute_chords(key, mode, chord_length):
+    """ Get all chords with prespecified lengths for a key and mode. See ChordGenerator.get_chords
+
+    :param key: str, e.g. 'C', 'F#', 'Bb'
+    :param mode: str, choose from:
+    ['ionian', 'dorian', 'phrygian', 'lydian', 'mixolydian', 'aeolian', 'locrian']
+    :param chord_length: str, lengths (int) separated by '-'. E.g.: '3-4-5'
+    :return: dict with chord name (key) and the notes (values). Cached, so don't alter it
+    """
+    mode_chromatic = _get_mode_chromatic(key, mode in _SHARP_MODES)
+    mode_scale = _get_mode_scale(mode, mode_chromatic)
+
+    # First, get the chord positions. These only depend on chord_length, not on the note
+    chord_positions_total = _get_chord_positions(chord_length)
+
+    # Work with pitch classes (0-11) instead of note names. The names are only needed again for the output
+    key_id = SEMITONE[key]
+    mode_scale_ids = tuple((key_id + offset) % 12 for offset in MODE_OFFSETS[mode])
+
+    # Get the major scale for every note in the mode from the precomputed table, also as pitch classes
+    major_scale_ids = tuple(_MAJOR_SCALE_IDS[note_id] for note_id in mode_scale_ids)
+
+    # Get the difference between the mode and major scale for all notes in the mode at once
+    scale_diffs = _compute_scale_diffs(mode_scale_ids, major_scale_ids)
+
+    # Second, iterate over all notes inside the mode, get the chord and compare it with its major variant
+    # Every position is independent of the others, only the results are merged
+    chords_dict = {}
+    for position in range(len(mode_scale)):
+        chords_dict.update(_chords_for_position(position, mode_scale, scale_diffs[position], chord_positions_total))
+
+    return chords_dict
+
+
+def _chords_for_position(position, mode_scale, scale_diff, chord_positions_total):
+    """ Get all chords for one note inside the mode. See _compute_chords
+
+    :param position: int, position of the note of interest inside the mode (0-6)
+    :param mode_scale: tuple, the notes that are inside the scale of the mode
+    :param scale_diff: tuple, difference between the mode and major scale with first note being the note of interest
+    :param chord_positions_total: tuple with tuple elements. All chords positions, see _get_chord_positions
+    :return: dict with chord name (key) and the notes (values)
+    """
+    # Search up the chord difference in the codebook
+    # Instead of rolling and repeating the scales, wrap around with % 7 to allow a chord like 1,3,5,9
+    chords_dict = {}
+    for chord_positions in chord_positions_total:
+        # Get the chord difference from the scale difference of the note of interest
+        chord_diff = tuple(scale_diff[i % 7] for i in chord_positions)
+
+        # Get the notes inside the mode chord, counted from the note of interest, and fill up to 7 with empty strings
+        mode_chord = [mode_scale[(position + i) % 7] for i in chord_positions]
+        mode_chord += ['']*(7 - len(mode_chord))
+
+        # Get appendable item
+        chords = _construct_chord_dict(chord_diff, mode_chord, chord_positions, _CHORD_NAME_BY_DIFF)
+        chords_dict.update(chords)
+
+    return chords_dict
+
+
+def _compute_scale_diffs(mode_scale_ids, major_scale_ids):
+    """ Get the difference in semitones between the mode scale and the major scale, for every note in the mode
+
+    :param mode_scale_ids: tuple, pitch classes (0-11) of the notes inside the mode
+    :param major_scale_ids: tuple with tuple elements, pitch classes of the major scale of every note in the mode
+    :return: tuple with tuple elements. Element i is the difference for the mode rolled to start at note i.
+    E.g. (0, 0, 0, 1, 0, 0, 0) for the first note of lydian. Differences wrap around the octave to the range [-6, 5]
+    """
+    # The mode scale rolled to start at position is mode_scale_ids[(position + i) % n_notes]
+    n_notes = len(mode_scale_ids)
+    return tuple(tuple((mode_scale_ids[(position + i) % n_notes] - major_id + 6) % 12 - 6
+                       for i, major_id in enumerate(major_scale_ids[position]))
+                 for position in range(n_notes))
+
+
+def _rotate(seq, k):
+    """ Rotate a list or tuple to the left, so that the element at index k appears first
+
+    :param seq: list or tuple
+    :param k: int, index of the element that should appear first
+    :return: list or tuple (same type as seq), rotated sequence
+    """
+    return seq[k:] + seq[:k]
+
+
+def _pick_chromatic(note):
+    """ Get the chromatic scale that suits a root note
+
+    :param note: str, e.g. 'C', 'F#', 'Bb'
+    :return: tuple, CHROMATIC_FLATS if the note is in _FLAT_ROOTS, else CHROMATIC_SHARPS
+    """
+    return CHROMATIC_FLATS if note in _FLAT_ROOTS else CHROMATIC_SHARPS
+
+
+@functools.lru_cache(maxsize=None)
+def _get_mode_chromatic(key, use_sharps):
+    """ Get the chromatic scale used for the mode, rolled so that the key is the first note
+
+    :param key: str, e.g. 'C', 'F#', 'Bb'
+    :param use_sharps: bool, True for the chromatic scale with sharps (lydian), False for the one with flats
+    :return: tuple, chromatic scale with either sharps or flats, depending on mode. Key note appears first.
+    """
+    # Roll to set key as first note
+    mode_chromatic = CHROMATIC_SHARPS if use_sharps else CHROMATIC_FLATS
+
+    return _rotate(mode_chromatic, mode_chromatic.index(key))
+
+
+@functools.lru_cache(maxsize=None)
 def _get_mode_scale(mode, mode_chromatic):
     """ Get a list of notes that are in the mode
 
     :param mode: str, choose from:
     ['ionian', 'dorian', 'phrygian', 'lydian', 'mixolydian', 'aeolian', 'locrian']
-    :param mode_chromatic: list, chromatic scale with either sharps or flats, depending on mode. Key note appears first.
-    :return: list, the notes that are inside the scale of the mode of choice
+    :param mode_chromatic: tuple, chromatic scale with either sharps or flats, depending on mode. Key note appears first.
+    :return: tuple, the notes that are inside the scale of the mode of choice
     """
+    # The offsets are precomputed at import, only pick the correct notes of the chromatic scale
+    return tuple(mode_chromatic[offset] for offset in MODE_OFFSETS[mode])
 
-    # Step 1: Steps vector
-    ionian_steps = [2,2,1,2,2,2,1]  # W-W-H-W-W-W-H (Major scale (Ionian)). Whole (W) = 2 steps, Half (H) = 1 step
-    roll_dict = {'ionian': 0,
-                 'dorian': -1,
-                 'phrygian': -2,
-                 'lydian': -3,
-                 'mixolydian': -4,
-                 'aeolian': -5,
-                 'locrian': -6}  # Dictionary that contains the shift of the steps vector for a mode
-    mode_specific_steps = np.roll(ionian_steps, roll_dict.get(mode))  # Roll the steps vector specific for the mode
 
-    # Step 2: Get the absolute positions in chromatic scale.
-    chromatic_positions = np.cumsum(mode_specific_steps)  # Shifted 1 position; first note is after 1 whole step.
-    chromatic_positions = np.insert(chromatic_positions[:-1], 0, 0)  # Solution: add 0 at start and remove last value
+def _get_major_scale(note):
+    """ Get the major scale for a note, with only notes that appear in the chromatic scales
 
-    # Step 3: Get the correct notes of the chromatic scale
-    scale = mode_chromatic[chromatic_positions]
+    :param note: str, note of interest. E.g. 'C', 'Db', 'G#'
+    :return: tuple, the notes of the major scale. E.g. ('D', 'E', 'F#', 'G', 'A', 'B', 'C#') for 'D'
+    """
+    # Convert the note to how it appears in the circle of fifths to be able to get major scale
+    major_scale = ChordGenerator.MAJOR_SCALE_DICT[_COF_NOTES.get(note, note)]
 
-    return np.array(scale)
+    # Convert some sharps and flats that are tonically identical to another note. E.g. 'E#' becomes 'F'
+    return tuple(_SPECIAL_NOTES.get(note, note) for note in major_scale)
 
 
-def _get_chrom_and_major_scale(note, major_scale_dict):
-    """ Get chromatic scale and major scale for a note.
+def _invert_chord_names(chord_names_dict):
+    """ Invert the chord names dictionary, so that the chord_diff_code becomes the key
 
-    CAVE: after converting the major scale, it could consist of e.g. 'F' and 'F#', where this is normally not possible.
-    However, it is necessary to get the right positions in the chromatic scale.
+    E.g. [0,0,0,0] occurs for a 1,3,5,6 (6h) - 1,3,5,7 (Maj 7th) - 1,3,5,9 (Add 9) chord.
+    To get the correct one, chords with 4 or more notes also get the last value of the chord in their key.
+    The last value is taken from the name. E.g. ('Major 7th': [0,0,0,0]) becomes ((0,0,0,0,7): 'Major 7th')
 
-    :param note: str, note of interest. E.g. 'C', 'Db', 'G#'
-    :param major_scale_dict: dict, dictionary containing the major scales for a note
-    :return: rolled_chromatic, major_scale
+    :param chord_names_dict: dict, keys are the extension of the chord (E.g. 'augmented'), values are chord_diff_code
+    :return: dict, keys: tuple, chord_diff_code (+ last value of the chord), values: the extension of the chord
     """
-    # preparation: convert the note to how it appears in the circle of fifths to be able to get major scale
-    cof_notes_conv_dict = {'A#': 'Bb',
-                           'D#': 'Eb',
-                           'G#': 'Ab',
-                           'E#': 'F',
-                           'Fb': 'E',
-                           'B#': 'C',
-                           'Cb': 'B'}
-    note = cof_notes_conv_dict.get(note) if note in cof_notes_conv_dict.keys() else note
-
-    # Step 1. Get the chromatic scale with the first note being the note of interest
-    if note in ['F', 'A#', 'Bb', 'D#', 'Eb', 'G#', 'Ab', 'Db', 'Gb', 'Cb']:
-        chromatic = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
-    else:
-        chromatic = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    rolled_chromatic = list(np.roll(chromatic, -chromatic.index(note)))  # roll
-
-    # Step 2. We take the major scale that suits the note
-    major_scale = major_scale_dict.get(note)
-
-    # Step 3. Convert the major scale: Convert some sharps and flats that are tonically identical to another note
-    special_notes_dict = {'E#': 'F',
-                          'Fb': 'E',
-                          'B#': 'C',
-                          'Cb': 'B'}
-    major_scale = [special_notes_dict.get(note) if note in list(special_notes_dict.keys()) else note
-                   for note in major_scale]
-
-    return rolled_chromatic, major_scale
-
-
-def _construct_chord_dict(chord_diff_code, mode_chord, chord_positions, chord_names_dict):
+    chord_name_by_diff = {}
+    for name, value in chord_names_dict.items():
+        if len(value) < 4:
+            chord_name_by_diff.setdefault(tuple(value), name)  # setdefault: the first name in the dict wins
+        else:
+            for number in re.findall('[0-9]+', name):
+                chord_name_by_diff.setdefault(tuple(value) + (int(number),), name)
+
+    return chord_name_by_diff
+
+
+# Inverse of the chord names dictionary, so that a chord name is found with a single lookup
+_CHORD_NAME_BY_DIFF = _invert_chord_names(ChordGenerator.CHORD_NAMES_DICT)
+
+# Major scale of every pitch class (0-11), as pitch classes. E.g. _MAJOR_SCALE_IDS[2] is D major: (2, 4, 6, 7, 9, 11, 1)
+_MAJOR_SCALE_IDS = tuple(tuple(SEMITONE[note] for note in _get_major_scale(root)) for root in CHROMATIC_SHARPS)
+
+
+def _construct_chord_dict(chord_diff_code, mode_chord, chord_positions, chord_name_by_diff):
     """ Get the names of the chords, and the notes inside it, for mode chords.
     The name is found by searching up the difference between the major chord and the mode chord for a note in the mode
 
-    :param chord_diff_code: list, difference mode - major for a chord. E.g. [0,-1,0] is minor (1, 3b, 5)
-    :param mode_chord: list, notes inside the mode chord
-    :param chord_positions: list, positions of the chord in the chromatic scale
-    :param chord_names_dict: dict, keys are the extension of the chord (E.g. 'augmented'), values are chord_diff_code
+    :param chord_diff_code: tuple, difference mode - major for a chord. E.g. (0,-1,0) is minor (1, 3b, 5)
+    :param mode_chord: list, notes inside the mode chord. Stored as is, not copied
+    :param chord_positions: tuple, positions of the chord in the chromatic scale
+    :param chord_name_by_diff: dict, inverted chord names dictionary. See _invert_chord_names
     :return: dict, keys: chord name (the note + extension (E.g. 'C_Major')), values: the notes inside the chord
     """
     # Get the root note
     note = mode_chord[0]
 
-    # Search code up in dict and get name. (we can't use .get() since we look up value instead of key)
-    for name, value in chord_names_dict.items():
-        if value == list(chord_diff_code):
-
-            # One odd chord (6th added 9) that is necessary to mention on it's own
-            if chord_positions[-2]+1 == 6 and chord_positions[-1]+1 == 9:
-                return {f'{note}_6th added 9': list(mode_chord)}
+    # Search code up in the inverted dict and get name. Chords of 4 or more notes also need their last value
+    # If chord wasn't found, the name is f'{note}_Unknown'
+    last_value = chord_positions[-1] + 1  # E.g. 9 for a 1,3,5,9 chord
+    key = chord_diff_code if len(chord_diff_code) < 4 else chord_diff_code + (last_value,)
+    name = chord_name_by_diff.get(key, 'Unknown')
 
-            # E.g. [0,0,0,0] occurs for a 1,3,5,6 (6h) - 1,3,5,7 (Maj 7th) - 1,3,5,9 (Add 9) chord.
-            # To get the correct one, the last value should be in the name. Hence the if statement.
-            if len(chord_diff_code) >= 4 and str(chord_positions[-1]+1) not in name:
-                continue
-            return {f'{note}_{name}': list(mode_chord)}
+    # One odd chord (6th added 9) that is necessary to mention on it's own
+    if name != 'Unknown' and last_value == 9 and chord_positions[-2] + 1 == 6:
+        name = '6th added 9'
 
-    # If chord wasn't found, return f'{note}_Unknown'
-    return {f'{note}_Unknown': list(mode_chord)}
+    return {f'{note}_{name}': mode_chord}
 
 
+@functools.lru_cache(maxsize=None)
 def _get_chord_positions(chord_length):
     """ Get all possible positions of chords in chromatic scale given the length of the chord
+    The result is cached per chord_length, hence it is returned as an immutable tuple of tuples
 
     :param chord_length: str, lengths (int) separated by '-'. E.g.: '3-4-5'
-    :return: list with list elements. All chords positions in the chromatic scale
+    :return: tuple with tuple elements. All chords positions in the chromatic scale
     """
-    # Initialize dictionary with the chord positions
-    positions_dict = {'3': [[0, 2, 4]],
-                      '4': [[0, 2, 4, 5], [0, 2, 4, 6], [0, 2, 4, 8]],
-                      '5': [[0, 2, 4, 5, 8], [0, 2, 4, 6, 8]],
-                      '6': [[0,2,4,6,8,10]],
-                      '7': [[0,2,4,6,8,10,12]]
-                      }  # For intuition: read this with +1 --> [0,2,4]: [1,3,5].
-
     # Get the keys for the dictionary
     chord_length_list = chord_length.split('-')
 
     # Initialize empty vector
     all_positions = []
     for chord_length in chord_length_list:
-        all_positions.extend(positions_dict.get(chord_length))
+        all_positions.extend(_CHORD_POSITIONS.get(chord_length))
 
-    return all_positions
+    return tuple(all_positions)
 
 
+@functools.lru_cache(maxsize=None)
 def _get_chromatic_midi_dict(key, chromatic):
-    """ Create a dict wherein chromatic scale is coupled with midi notes. Root note is the first key
+    """ Create a dict wherein chromatic scale is coupled with midi notes, in the octave starting at the root note
 
-    :param chromatic: list, chromatic scale according with the mode (flats or sharps)
+    :param chromatic: tuple, chromatic scale according with the mode (flats or sharps), in any rotation
     :param key: str, e.g. 'C', 'F#', 'Bb'
-    :return: dict
+    :return: read-only dict (MappingProxyType), since the result is cached
+    """
+    if key not in chromatic:
+        raise ValueError(f'{key} is not in the chromatic scale {chromatic}')
+
+    # The root note gets its midi note counted from C4 (60), the other notes follow within 12 semitones
+    key_id = SEMITONE[key]
+    chromatic_note_dict = {note: 60 + key_id + (SEMITONE[note] - key_id) % 12 for note in chromatic}
+
+    return MappingProxyType(chromatic_note_dict)
+
+
+def _encode_varlen(value):
+    """ Encode a number as a MIDI variable-length quantity: 7 bits per byte, all bytes but the last have bit 8 set
+
+    :param value: int, e.g. a delta time in ticks
+    :return: bytes
     """
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    return bytes(reversed(data))
 
-    # Roll chromatic scale back so that C appears first
-    chromatic = list(chromatic)
-    chromatic = list(np.roll(chromatic, -chromatic.index('C')))
 
-    # Couple chromatic scale with the midi notes
-    midi_notes = range(60, 72)  # MIDI note number
-    chromatic_note_dict = dict(zip(chromatic, midi_notes))
+def _midi_track(notes, tempo_bpm=60, name=None):
+    """ Encode notes as a midi track chunk. Volume 100 (0-127 as per MIDI standard)
 
-    # Get the note corresponding with the key of the mode
-    root_midi_note = chromatic_note_dict.get(key)
+    :param notes: list with (pitch, time, duration) tuples. pitch as midi note number, time and duration in beats
+    :param tempo_bpm: int, tempo in beats per minute. No tempo event if None, for all but the first track of a
+    format 1 file: there the tempo belongs in the first track only
+    :param name: str, name of the track. No name if None
+    :return: bytes, the 'MTrk' chunk
+    """
+    # Note on and note off events as (tick, order, message). On the same tick, note offs (0) go before note ons (1)
+    events = []
+    for pitch, time, duration in notes:
+        events.append((int(time * _MIDI_TICKS_PER_BEAT), 1, bytes((0x90, pitch, 100))))
+        events.append((int((time + duration) * _MIDI_TICKS_PER_BEAT), 0, bytes((0x80, pitch, 0))))
+    events.sort()
+
+    # Track: name, tempo (microseconds per beat), the events with the ticks since the previous event, end of track
+    track = bytearray()
+    if name is not None:
+        name = name.encode()
+        track += b'\x00\xff\x03' + _encode_varlen(len(name)) + name
+    if tempo_bpm is not None:
+        track += b'\x00\xff\x51\x03' + (60_000_000 // tempo_bpm).to_bytes(3, 'big')
+    previous_tick = 0
+    for tick, _, message in events:
+        track += _encode_varlen(tick - previous_tick) + message
+        previous_tick = tick
+    track += b'\x00\xff\x2f\x00'
+
+    return b'MTrk' + len(track).to_bytes(4, 'big') + track
+
+
+def _write_midi_tracks(path, tracks):
+    """ Write track chunks to a midi file. Format 0 for a single track, format 1 (simultaneous tracks) for more
+
+    :param path: str, path of the midi file
+    :param tracks: list with track chunks, see _midi_track
+    """
+    midi_format = 0 if len(tracks) == 1 else 1
+    header = b'MThd' + (6).to_bytes(4, 'big') + midi_format.to_bytes(2, 'big') + len(tracks).to_bytes(2, 'big') \
+             + _MIDI_TICKS_PER_BEAT.to_bytes(2, 'big')
 
-    # Create chromatic midi_notes vector from the root note onwards
-    midi_notes = range(root_midi_note, root_midi_note + 12)
+    with open(path, "wb") as output_file:  # Write the midi file
+        output_file.write(header + b''.join(tracks))
 
-    # Roll the chromatic scale
-    rolled_chromatic = np.roll(chromatic, -chromatic.index(key))
 
-    # Combine together in final dictionary
-    chromatic_note_dict = dict(zip(rolled_chromatic, midi_notes))
+def _write_midi(path, notes, tempo_bpm=60):
+    """ Write a single track midi file, encoded directly. Volume 100 (0-127 as per MIDI standard)
 
-    return chromatic_note_dict
+    :param path: str, path of the midi file
+    :param notes: list with (pitch, time, duration) tuples. pitch as midi note number, time and duration in beats
+    :param tempo_bpm: int, tempo in beats per minute
+    """
+    _write_midi_tracks(path, [_midi_track(notes, tempo_bpm)])
 
 
 def _mode_notes_from_chromatic(big_dict, mode_scale):
@@ -425,20 +616,19 @@ def _mode_notes_from_chromatic(big_dict, mode_scale):
 
     :param big_dict: dict, total dictionary with all keys and values
     :param mode_scale: list, the notes inside the mode
-    :return: subset of the big dictionary
+    :return: subset of the big dictionary, in the order of mode_scale
     """
-    sub_dict = {}
-    for key, value in big_dict.items():
-        if '/' in key:
-            for Note in key.split('/'):
-                if Note in mode_scale:
-                    sub_dict.update({Note: value})
-        else:
-            Note = key
-            if Note in mode_scale:
-                sub_dict.update({Note: value})
+    return {note: big_dict[note] for note in mode_scale if note in big_dict}
+
+
+def _format_table_row(values, chars_per_cell):
+    """ Format the values of a table row as one string, every value centered in a fixed number of characters
 
-    return sub_dict
+    :param values: iterable, the values of the row
+    :param chars_per_cell: int, number of characters per value. Longer values are cut off
+    :return: str
+    """
+    return ''.join(str(value)[:chars_per_cell].center(chars_per_cell) for value in values)
 
 
 # Resource: https://towardsdatascience.com/creating-pdf-files-with-python-ad3ccadfae0f
@@ -533,7 +723,11 @@ class PDF(FPDF):
         """
         self.write(self.line_height_dict.get('regular'), f'{text}\n')  # add line break after each text section
 
-    def add_table(self, df):
+    def add_table(self, rows, header):
+        """ Print a table row by row, so the rows don't need to be collected in e.g. a dataframe first
+        :param rows: iterable with a tuple per row, one value per column
+        :param header: tuple, the column names
+        """
 
         # Start with whitespace
         self.write(self.line_height_dict.get('regular'), '\n')  # Start again from the left
@@ -543,44 +737,41 @@ class PDF(FPDF):
         self.set_font('Courier', style = '', size = table_font)  # Use Courier for tables for fixed width
 
         # Additional calculations
-        reference_page = self.page_no()
-        n_rows = df.shape[0]
-        n_cols = df.shape[1]
+        n_cols = len(header)
         cell_width = 20
         cell_height = 4
         max_width = self.pdf_w - self.l_margin - self.r_margin
         max_cells = int(np.floor(max_width/cell_width))
 
         # Check if printing is at all possible
-        if df.shape[1] > max_cells:
+        if n_cols > max_cells:
             raise ValueError(f'Please enter a maximum of {max_cells} columns')
 
+        # Courier has a fixed width, so a whole row can be printed as one string, with one cell per row
+        row_width = cell_width * n_cols
+        chars_per_cell = int(cell_width / self.get_string_width(' '))
+        header_text = _format_table_row([column[:10] for column in header], chars_per_cell)  # First 10 chars only
+
         # Print the columns
         self.set_font('Courier', 'BI', size=table_font)
-        for column in df.columns:
-            self.cell(cell_width, cell_height, column[:10], 1, 0, 'C')  # Only get first 10 chars of columns
+        self.cell(row_width, cell_height, header_text, 1, 0, 'L')
         self.set_font('Courier', '', size=table_font)
 
         self.write(cell_height, '\n')  # Start again from the left
 
-        # Loop over all cells in the dataframe
-        column_count = 0
-        for i in range(n_rows):
+        # Loop over all rows, one at a time
+        for row in rows:
 
-            # Print columns again if cells come on a new page, and update reference page
-            if reference_page != self.page_no():
+            # If the row doesn't fit on the page anymore, continue on a new page and print the columns again
+            if self.get_y() + cell_height > self.pdf_h - self.b_margin:
+                self.add_page()
                 self.set_font('Courier','BI',size=table_font)
-                for column in df.columns:
-                    self.cell(cell_width, cell_height, column[:10], 1, 0, 'C')  # Only get first 10 chars of columns
+                self.cell(row_width, cell_height, header_text, 1, 0, 'L')
                 self.write(cell_height, '\n')  # Start again from the left
                 self.set_font('Courier','',size=table_font)
-                reference_page += 1
 
             # Print a row
-            for j in range(n_cols):
-                column_count += 1
-                value = df.iloc[i, j]
-                self.cell(cell_width, cell_height, str(value), 1, 0, 'C')
+            self.cell(row_width, cell_height, _format_table_row(row[:n_cols], chars_per_cell), 1, 0, 'L')
 
             self.write(cell_height, '\n')  # Start again from the left
 